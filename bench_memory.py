@@ -0,0 +1,83 @@
+# bench_memory.py
+# Memory benchmark of the message log layouts for the WordWatch Bot
+#
+# Builds the same synthetic log twice, once in the JSON-shaped layout of dicts and ISO strings
+# the bot used to keep in memory and once with log_store.ChannelLog, and compares the memory
+# each allocates as measured by tracemalloc.
+#
+# Usage:
+#   python bench_memory.py --days 90 --channels 20 --messages 200 --authors 50
+
+import argparse
+import datetime
+import json
+import random
+import tracemalloc
+
+from log_store import load_message_log
+
+WORDS = ("lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do",
+         "eiusmod", "tempor", "incididunt", "ut", "labore", "et", "dolore", "magna", "aliqua", "enim")
+
+
+def synthetic_log_json(args):
+    """Returns the message log as message_log.json would hold it."""
+    rng = random.Random(args.seed)
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    log = {}
+    for day in range(args.days):
+        date = start + datetime.timedelta(days=day)
+        channels = log[date.strftime('%Y-%m-%d')] = {}
+        for channel in range(args.channels):
+            channels[str(100000000000000000 + channel)] = [{
+                "author": f"member-{rng.randrange(args.authors)}",
+                "content": " ".join(rng.sample(WORDS, 10)),
+                "timestamp": (date + datetime.timedelta(seconds=rng.randrange(86400))).isoformat()
+            } for _ in range(args.messages)]
+    return json.dumps(log)
+
+
+def measure(build):
+    """Returns the object built and the bytes still allocated for it."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory of the JSON-shaped and compact message logs.")
+    parser.add_argument("--days", type=int, default=90, help="days of logs")
+    parser.add_argument("--channels", type=int, default=20, help="channels logged per day")
+    parser.add_argument("--messages", type=int, default=200, help="messages per channel per day")
+    parser.add_argument("--authors", type=int, default=50, help="distinct authors")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--min-ratio", type=float, help="exit with status 1 if the compact log saves less than this factor")
+    args = parser.parse_args()
+
+    # Both layouts are decoded from the same JSON text, as the bot does at startup
+    text = synthetic_log_json(args)
+    entries = args.days * args.channels * args.messages
+    json_log, json_bytes = measure(lambda: json.loads(text))
+    compact_log, compact_bytes = measure(lambda: load_message_log(json.loads(text)))
+    assert sum(len(channel_log) for channels in compact_log.values() for channel_log in channels.values()) == entries
+
+    # The content strings are shared by both layouts, so also report the overhead without them
+    content_bytes = sum(content.__sizeof__() for channels in compact_log.values() for channel_log in channels.values()
+                        for content in channel_log.contents)
+    ratio = json_bytes / compact_bytes
+    overhead_ratio = (json_bytes - content_bytes) / (compact_bytes - content_bytes)
+    print(f"entries: {entries}")
+    print(f"json_layout_bytes: {json_bytes} ({json_bytes / entries:.1f} per entry)")
+    print(f"compact_layout_bytes: {compact_bytes} ({compact_bytes / entries:.1f} per entry)")
+    print(f"ratio: {ratio:.2f}x")
+    print(f"ratio_excluding_content: {overhead_ratio:.2f}x")
+    if args.min_ratio is not None and ratio < args.min_ratio:
+        print(f"FAIL: ratio {ratio:.2f}x is below {args.min_ratio}x")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
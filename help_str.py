@@ -15,18 +15,18 @@ watchword_str = "Starts monitoring a specific word or phrase in your messages. Y
 deleteword_str = "Stops monitoring the specified word and clears all associated logs."
 watchclear_str = "Removes all words from your watch list and clears all logs."
 cd_str = "Sets a cooldown period for alerts on each word to avoid spamming notifications."
-worddetail_str = "Provides detailed information about a watched word, including where it is being monitored."
+worddetail_str = "Provides detailed information about a watched word, including where it is being monitored and how often it was mentioned over the last hours and days."
 addfilter_str = "Adds channel-specific filters to a watched word, allowing you to monitor the word only in selected channels."
 deletefilter_str = "Removes channel-specific filters from a watched word."
 clearfilter_str = "Removes all channel filters from a watched word, making it monitored in all channels."
 fetchhistory_str = "Retrieves historical messages within a specified date range for analysis. This can be limited to specific channels."
-exportlogs_str = "Exports logs of all detected words within a specified date range to an Excel file."
+exportlogs_str = "Exports this server's logs of all detected words within a specified date range to an Excel file."
 forcesave_str = "Immediately saves all current data to the server. This is restricted to administrators only."
 botstop_str = "Safely shuts down the bot and saves all data. Restricted to administrators only."
-admindashboard_str = "Displays administrative settings and statistics for the bot."
+admindashboard_str = "Displays administrative settings and statistics for the bot, including the most mentioned keywords of the last 24 hours."
 addrole_str = "Adds a role to the permission list for a specific command, allowing users with that role to execute the command."
 removerole_str = "Removes a role from the permission list for a specific command, preventing users with that role from executing the command."
-listwatched_str = "Lists all watched words and the users watching them. Shows user details alongside the words they are monitoring."
+listwatched_str = "Lists all words watched in the server and the users watching them. Shows user details alongside the words they are monitoring."
 setscan_str = "Adjusts the frequency at which the bot scans messages. Specify the time in seconds."
 setsave_str = "Adjusts the frequency at which the bot saves data to the server. Specify the time in minutes."
 checkname_str = "Displays the nickname and display name of the user who invokes the command. Useful for verification and administrative tasks."
@@ -35,7 +35,11 @@ addnotify_str = "Adds members to the notification list for a watched word."
 removenotify_str = "Removes members from the notification list for a watched word."
 setverbosity_str = "Adjusts the verbosity level of console outputs. Specify the level (`debug`, `info`, `warning`, `error`) to control the detail of logs."
 clear_dm_str = "Clears all messages sent by the bot in this DM. Use with caution as this cannot be undone."
-clearlogs_str = "Clears all stored message logs and deletes exported Excel files. Includes a confirmation step to prevent accidental data loss."
+clearlogs_str = "Clears all stored message logs of this server and deletes its exported Excel files. Includes a confirmation step to prevent accidental data loss."
+watchwords_str = "Starts monitoring many words at once. List the words (and optionally channels) in the command, or attach a JSON or CSV watch list such as one made by `exportwords`."
+deletewords_str = "Stops monitoring several words at once and clears all of their logs."
+exportwords_str = "Exports your watch list for this server, with channel filters and notification lists, as a `json` (default) or `csv` file."
+searchlogs_str = "Searches the logged messages for the given terms. Narrow the search with `in:#channel`, `author:<name>` (quote names with spaces), `from:YYYYMMDD` and `to:YYYYMMDD`, and use `page:<n>` to browse the results."
 
 
 
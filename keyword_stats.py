@@ -0,0 +1,205 @@
+# keyword_stats.py
+# Time-bucketed keyword hit counters for the WordWatch Bot
+
+import time
+
+# Bucket width in seconds and number of buckets kept for each resolution
+RESOLUTIONS = {
+    'minute': (60, 60),  # Last hour
+    'hour': (3600, 48),  # Last two days
+    'day': (86400, 30),  # Last month
+}
+
+# Key used for the counter summed over every channel of a keyword
+ALL_CHANNELS = "all"
+
+# Hits older than the longest ring cannot show up in any trend, so they are not counted
+WINDOW = max(width * size for width, size in RESOLUTIONS.values())
+
+# Milliseconds between the Unix epoch and the Discord epoch used in snowflake ids
+DISCORD_EPOCH_MS = 1420070400000
+
+
+def snowflake_time(snowflake):
+    """Returns the creation time in epoch seconds encoded in a Discord id."""
+    return ((snowflake >> 22) + DISCORD_EPOCH_MS) / 1000
+
+
+class RingCounter:
+    """Fixed-size ring of hit counts, one slot per time bucket."""
+    __slots__ = ('width', 'buckets', 'counts')
+
+    def __init__(self, width, size):
+        self.width = width
+        self.buckets = [-1] * size  # Bucket number currently held by each slot
+        self.counts = [0] * size
+
+    def add(self, timestamp, amount=1):
+        bucket = int(timestamp // self.width)
+        slot = bucket % len(self.counts)
+        if self.buckets[slot] != bucket:
+            if self.buckets[slot] > bucket:
+                return  # A newer bucket already took this slot, the hit is outside the window
+            self.buckets[slot] = bucket
+            self.counts[slot] = 0
+        self.counts[slot] += amount
+
+    def series(self, now, count):
+        """Returns the counts of the last `count` buckets, oldest first, ending with the bucket holding `now`."""
+        size = len(self.counts)
+        current = int(now // self.width)
+        result = []
+        for bucket in range(current - min(count, size) + 1, current + 1):
+            slot = bucket % size
+            result.append(self.counts[slot] if self.buckets[slot] == bucket else 0)
+        return result
+
+    def to_dict(self):
+        return {"buckets": self.buckets, "counts": self.counts}
+
+    def load(self, data):
+        if len(data["counts"]) == len(self.counts):
+            self.buckets = list(data["buckets"])
+            self.counts = list(data["counts"])
+
+
+class KeywordCounter:
+    """Hit counters of one keyword in one channel (or all channels) at every resolution."""
+    __slots__ = ('total', 'last', 'rings')
+
+    def __init__(self):
+        self.total = 0
+        self.last = 0  # Epoch seconds of the newest hit
+        self.rings = {name: RingCounter(width, size) for name, (width, size) in RESOLUTIONS.items()}
+
+    def add(self, timestamp):
+        self.total += 1
+        self.last = max(self.last, timestamp)
+        for ring in self.rings.values():
+            ring.add(timestamp)
+
+    def to_dict(self):
+        return {"total": self.total, "last": self.last, "rings": {name: ring.to_dict() for name, ring in self.rings.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        counter = cls()
+        counter.total = data.get("total", 0)
+        for name, ring_data in data.get("rings", {}).items():
+            if name in counter.rings:
+                counter.rings[name].load(ring_data)
+        # Files written before the newest hit was kept fall back to the start of the newest non-empty bucket
+        counter.last = data.get("last", max((bucket * ring.width for ring in counter.rings.values()
+                                             for bucket, count in zip(ring.buckets, ring.counts) if count), default=0))
+        return counter
+
+
+class KeywordStats:
+    """Keyword hit counters keyed by guild, keyword and channel, updated at match time."""
+
+    def __init__(self):
+        self.counters = {}  # guild_id -> keyword -> channel_id (or ALL_CHANNELS) -> KeywordCounter
+        self.seen = {}  # guild_id -> keyword -> ids of the messages counted within WINDOW
+
+    def record(self, guild_id, keyword, channel_id, timestamp=None, message_id=None):
+        """Counts one hit of a keyword in a channel.
+
+        Returns False if the message was already counted for the keyword, or if it is older than WINDOW.
+        Only ids inside the window are remembered, so the dedupe state stays bounded by the rings.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if message_id is not None:
+            if timestamp < time.time() - WINDOW:
+                return False
+            seen = self.seen.setdefault(str(guild_id), {}).setdefault(keyword, set())
+            if message_id in seen:
+                return False
+            seen.add(message_id)
+        channels = self.counters.setdefault(str(guild_id), {}).setdefault(keyword, {})
+        for key in (str(channel_id), ALL_CHANNELS):
+            if key not in channels:
+                channels[key] = KeywordCounter()
+            channels[key].add(timestamp)
+        return True
+
+    def reset_keywords(self, guild_id, keywords):
+        """Drops the counters of some keywords of a guild, e.g. when their logs are cleared."""
+        for keyword in keywords:
+            self.counters.get(str(guild_id), {}).pop(keyword, None)
+            self.seen.get(str(guild_id), {}).pop(keyword, None)
+
+    def reset_guild(self, guild_id):
+        """Drops all counters of a guild."""
+        self.counters.pop(str(guild_id), None)
+        self.seen.pop(str(guild_id), None)
+
+    def prune_seen(self, guild_id, now=None):
+        """Forgets the ids of messages that fell out of WINDOW, using the time encoded in each id."""
+        cutoff = (time.time() if now is None else now) - WINDOW
+        keywords = self.seen.get(str(guild_id), {})
+        for keyword in list(keywords):
+            keywords[keyword] = {message_id for message_id in keywords[keyword] if snowflake_time(message_id) >= cutoff}
+            if not keywords[keyword]:
+                del keywords[keyword]
+
+    def last_seen(self, guild_id, keyword):
+        """Returns the epoch seconds of the newest counted hit of a keyword, or None."""
+        counter = self.get(guild_id, keyword)
+        return counter.last if counter and counter.last else None
+
+    def get(self, guild_id, keyword, channel_id=None):
+        """Returns the counter of a keyword in a channel, or across all channels if none is given."""
+        key = ALL_CHANNELS if channel_id is None else str(channel_id)
+        return self.counters.get(str(guild_id), {}).get(keyword, {}).get(key)
+
+    def trend(self, guild_id, keyword, resolution, count, channel_id=None, now=None):
+        """Returns the hit counts of the last `count` buckets of a resolution, oldest first."""
+        counter = self.get(guild_id, keyword, channel_id)
+        now = time.time() if now is None else now
+        if counter is None:
+            return [0] * min(count, RESOLUTIONS[resolution][1])
+        return counter.rings[resolution].series(now, count)
+
+    def top_channels(self, guild_id, keyword, resolution, count, limit=3, now=None):
+        """Returns (channel_id, hits) pairs for the channels with the most hits in the window."""
+        now = time.time() if now is None else now
+        channels = self.counters.get(str(guild_id), {}).get(keyword, {})
+        hits = [(channel_id, sum(counter.rings[resolution].series(now, count)))
+                for channel_id, counter in channels.items() if channel_id != ALL_CHANNELS]
+        hits = [pair for pair in hits if pair[1] > 0]
+        return sorted(hits, key=lambda pair: pair[1], reverse=True)[:limit]
+
+    def top_keywords(self, guild_id, resolution, count, limit=5, now=None):
+        """Returns (keyword, hits) pairs for the keywords with the most hits in the window."""
+        now = time.time() if now is None else now
+        hits = [(keyword, sum(channels[ALL_CHANNELS].rings[resolution].series(now, count)))
+                for keyword, channels in self.counters.get(str(guild_id), {}).items() if ALL_CHANNELS in channels]
+        hits = [pair for pair in hits if pair[1] > 0]
+        return sorted(hits, key=lambda pair: pair[1], reverse=True)[:limit]
+
+    def guild_to_dict(self, guild_id):
+        """Returns the counters of one guild in their JSON layout."""
+        self.prune_seen(guild_id)
+        return {
+            "counters": {keyword: {channel_id: counter.to_dict() for channel_id, counter in channels.items()}
+                         for keyword, channels in self.counters.get(str(guild_id), {}).items()},
+            "seen": {keyword: sorted(message_ids) for keyword, message_ids in self.seen.get(str(guild_id), {}).items()}
+        }
+
+    def load_guild(self, guild_id, data):
+        """Replaces the counters of one guild with ones loaded from their JSON layout."""
+        if "counters" not in data:
+            data = {"counters": data, "seen": {}}  # Files written before message ids were tracked
+        self.counters[str(guild_id)] = {keyword: {channel_id: KeywordCounter.from_dict(counter) for channel_id, counter in channels.items()}
+                                        for keyword, channels in data["counters"].items()}
+        self.seen[str(guild_id)] = {keyword: set(message_ids) for keyword, message_ids in data.get("seen", {}).items()}
+        self.prune_seen(guild_id)
+
+
+def sparkline(counts):
+    """Renders counts as a one-line bar chart."""
+    bars = "▁▂▃▄▅▆▇█"
+    peak = max(counts) if counts else 0
+    if peak == 0:
+        return bars[0] * len(counts)
+    return "".join(bars[min(len(bars) - 1, count * (len(bars) - 1) // peak)] for count in counts)
@@ -0,0 +1,378 @@
+# loadtest.py
+# End-to-end replay load harness for the WordWatch Bot
+#
+# Drives the real bot instance from main.py with a stubbed Discord client: guilds, channels,
+# members and DMs are in-process fakes and every REST call is counted instead of sent.
+# A recorded or synthetic message stream is replayed through the real command handlers
+# at N times real time, and detection-to-notification latency, REST calls, memory growth
+# and event-loop lag are reported.
+#
+# Usage:
+#   python loadtest.py --guilds 4 --channels 5 --rate 50 --hit-ratio 0.05 --duration 600 --speed 10
+#   python loadtest.py --replay recorded.jsonl --speed 0 --min-throughput 2000
+#
+# Recorded streams are JSON lines with guild_id, channel_id, author_id, author, content and
+# an ISO timestamp. With --min-throughput the harness exits with status 1 when the measured
+# messages per second fall below the threshold, so it can gate CI.
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, REPO_DIR)
+
+from keyword_stats import DISCORD_EPOCH_MS
+
+WORDS = ("lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do",
+         "eiusmod", "tempor", "incididunt", "ut", "labore", "et", "dolore", "magna", "aliqua", "enim")
+
+
+class Stats:
+    """Counters shared by all fakes during a run."""
+
+    def __init__(self):
+        self.rest_calls = {}
+        self.latencies = []
+        self.processed = 0
+
+    def rest(self, route):
+        self.rest_calls[route] = self.rest_calls.get(route, 0) + 1
+
+
+class FakeSentMessage:
+    def __init__(self, user, content):
+        self.user = user
+        self.content = content
+
+    async def edit(self, content=None, **kwargs):
+        self.user.stats.rest("PATCH /channels/{channel_id}/messages/{message_id}")
+        self.user.notified()
+        self.content = content
+        return self
+
+
+class FakeUser:
+    """A member or user; DMs sent to it are counted as REST calls and timed against the replay."""
+
+    def __init__(self, user_id, name, replay, stats):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.nick = None
+        self.replay = replay
+        self.stats = stats
+
+    def notified(self):
+        if self.replay.current_due is not None:
+            self.stats.latencies.append(time.perf_counter() - self.replay.current_due)
+
+    async def send(self, content=None, **kwargs):
+        self.stats.rest("POST /channels/{channel_id}/messages")
+        self.notified()
+        return FakeSentMessage(self, content)
+
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeMessage:
+    __slots__ = ('id', 'author', 'content', 'created_at', 'channel', 'guild', 'stickers', 'attachments')
+
+    def __init__(self, message_id, author, content, created_at, channel):
+        self.id = message_id
+        self.author = author
+        self.content = content
+        self.created_at = created_at
+        self.channel = channel
+        self.guild = channel.guild
+        self.stickers = []
+        self.attachments = []
+
+
+class FakeChannel:
+    """A text channel whose history() replays its share of the stream at the configured speed."""
+
+    def __init__(self, channel_id, guild, replay):
+        self.id = channel_id
+        self.guild = guild
+        self.name = f"channel-{channel_id}"
+        self.mention = f"<#{channel_id}>"
+        self.replay = replay
+        self.messages = []
+
+    async def history(self, limit=None, **kwargs):
+        self.replay.stats.rest("GET /channels/{channel_id}/messages")
+        for message in self.messages:
+            due = self.replay.due_time(message.created_at)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)  # Let other guilds and the lag monitor run
+            self.replay.current_due = due
+            self.replay.stats.processed += 1
+            yield message
+
+    def __str__(self):
+        return self.name
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+        self.text_channels = []
+        self.members = {}
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def get_channel(self, channel_id):
+        return next((channel for channel in self.text_channels if channel.id == channel_id), None)
+
+
+class FakeContext:
+    """Command context; replies are counted as REST calls."""
+
+    def __init__(self, author, guild, channel, stats):
+        self.author = author
+        self.guild = guild
+        self.channel = channel
+        self.stats = stats
+        self.message = FakeMessage(0, author, "", datetime.datetime.now(datetime.timezone.utc), channel)
+        self.replies = []
+
+    async def send(self, content=None, **kwargs):
+        self.stats.rest("POST /channels/{channel_id}/messages")
+        self.replies.append(content if content is not None else kwargs.get('embed'))
+
+
+class Replay:
+    """Per-guild replay clock mapping message timestamps to wall-clock due times."""
+
+    def __init__(self, stream_start, wall_start, speed, stats):
+        self.stream_start = stream_start
+        self.wall_start = wall_start
+        self.speed = speed
+        self.stats = stats
+        self.current_due = None
+
+    def due_time(self, created_at):
+        if self.speed <= 0:
+            return time.perf_counter()
+        return self.wall_start + (created_at - self.stream_start).total_seconds() / self.speed
+
+
+def synthetic_stream(args, rng):
+    """Generates (guild_id, channel_id, author_id, author, content, timestamp) records."""
+    # End the stream now, so its hits fall inside the keyword stats window
+    total = int(args.rate * args.duration)
+    start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=total / args.rate)
+    records = []
+    for i in range(total):
+        guild_id = 1000 + rng.randrange(args.guilds)
+        channel_id = guild_id * 100 + rng.randrange(args.channels)
+        author_id = guild_id * 1000 + rng.randrange(args.authors)
+        content = rng.sample(WORDS, 8)
+        if rng.random() < args.hit_ratio:
+            content.insert(rng.randrange(len(content)), f"keyword{rng.randrange(args.keywords)}")
+        records.append({
+            "guild_id": guild_id,
+            "channel_id": channel_id,
+            "author_id": author_id,
+            "author": f"author-{author_id}",
+            "content": " ".join(content),
+            "timestamp": (start + datetime.timedelta(seconds=i / args.rate)).isoformat()
+        })
+    return records
+
+
+def recorded_stream(path):
+    with open(path, "r", encoding='utf-8') as stream_file:
+        return [json.loads(line) for line in stream_file if line.strip()]
+
+
+async def monitor_loop_lag(lags, interval=0.01):
+    """Samples how late the event loop wakes up from a fixed sleep."""
+    while True:
+        before = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - before - interval)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    records = recorded_stream(args.replay) if args.replay else synthetic_stream(args, rng)
+    if not records:
+        raise SystemExit("The message stream is empty.")
+    for record in records:
+        record["created_at"] = datetime.datetime.fromisoformat(record["timestamp"])
+        if record["created_at"].tzinfo is None:
+            record["created_at"] = record["created_at"].replace(tzinfo=datetime.timezone.utc)
+    records.sort(key=lambda record: record["created_at"])
+    keywords = sorted({f"keyword{i}" for i in range(args.keywords)} | set(args.keyword or []))
+
+    # Run the real bot with its data files in a scratch directory, out of the working tree, removed afterwards
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="wordwatch-load-") as scratch_dir:
+        os.chdir(scratch_dir)
+        main = None
+        try:
+            import main
+            return await replay(main, args, records, keywords)
+        finally:
+            # The open search indexes hold files in the directory
+            if main is not None:
+                for index in main.bot.log_indexes.values():
+                    index.close()
+                main.bot.log_indexes.clear()
+            os.chdir(cwd)
+
+
+async def replay(main, args, records, keywords):
+    """Replays the records through the bot's commands and returns the report."""
+    bot = main.bot
+    bot.verbosity_level = args.verbosity
+
+    stats = Stats()
+    stream_start = records[0]["created_at"]
+    guilds = {}
+    users = {}
+    channels = {}
+    bot_user = FakeUser(1, "WordWatch", None, stats)
+    bot._connection.user = bot_user
+    bot.get_user = users.get
+    bot.get_channel = channels.get
+    bot.fetch_user = lambda user_id: asyncio.sleep(0, result=users.get(int(user_id)))
+
+    # Build the fake guilds, channels and members the stream refers to
+    for sequence, record in enumerate(records):
+        guild = guilds.get(record["guild_id"])
+        if guild is None:
+            guild = guilds[record["guild_id"]] = FakeGuild(record["guild_id"])
+            guild.replay = Replay(stream_start, 0.0, args.speed, stats)
+        channel = channels.get(record["channel_id"])
+        if channel is None:
+            channel = channels[record["channel_id"]] = FakeChannel(record["channel_id"], guild, guild.replay)
+            guild.text_channels.append(channel)
+        author = guild.members.get(record["author_id"])
+        if author is None:
+            author = guild.members[record["author_id"]] = FakeUser(record["author_id"], record["author"], guild.replay, stats)
+            users[author.id] = author
+        # Snowflake ids embed the creation time, as Discord's do
+        message_id = (int(record["created_at"].timestamp() * 1000) - DISCORD_EPOCH_MS) << 22 | sequence % (1 << 22)
+        channel.messages.append(FakeMessage(message_id, author, record["content"], record["created_at"], channel))
+
+    # Every guild gets a watcher who watches all keywords and is notified of them
+    contexts = []
+    for guild in guilds.values():
+        watcher = FakeUser(guild.id * 1000 + 999, f"watcher-{guild.id}", guild.replay, stats)
+        guild.members[watcher.id] = watcher
+        users[watcher.id] = watcher
+        ctx = FakeContext(watcher, guild, guild.text_channels[0], stats)
+        contexts.append(ctx)
+        bot.load_guild(guild.id)  # As the before_invoke hook does for real commands
+        for keyword in keywords:
+            await main.watchword(ctx, keyword)
+            await main.addnotify(ctx, keyword, watcher)
+
+    start_date = records[0]["created_at"].strftime("%Y%m%d")
+    end_date = records[-1]["created_at"].strftime("%Y%m%d")
+    stats.rest_calls.clear()
+
+    # Replay the stream through fetchhistory, one invocation per guild running concurrently
+    lags = []
+    lag_task = asyncio.create_task(monitor_loop_lag(lags))
+    memory_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    wall_start = time.perf_counter()
+    for guild in guilds.values():
+        guild.replay.wall_start = wall_start
+    await asyncio.gather(*(main.fetchhistory(ctx, start_date, end_date) for ctx in contexts))
+    elapsed = time.perf_counter() - wall_start
+
+    # Query paths after the load
+    for ctx in contexts:
+        await main.worddetail(ctx, keywords[0])
+        await main.searchlogs(ctx, query=keywords[0])
+    lag_task.cancel()
+    memory_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    for ctx in contexts:
+        errors = [reply for reply in ctx.replies if isinstance(reply, str) and reply.startswith("An error occurred")]
+        if errors:
+            raise SystemExit(f"A command failed for guild {ctx.guild.id}: {errors[0]}")
+
+    throughput = stats.processed / elapsed if elapsed else 0.0
+    report = {
+        "messages": stats.processed,
+        "guilds": len(guilds),
+        "channels": len(channels),
+        "keywords": len(keywords),
+        "speed": args.speed,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_msgs_per_second": round(throughput, 1),
+        "notifications": len(stats.latencies),
+        "latency_ms_p50": round(percentile(stats.latencies, 0.50) * 1000, 3),
+        "latency_ms_p99": round(percentile(stats.latencies, 0.99) * 1000, 3),
+        "latency_ms_max": round(max(stats.latencies, default=0.0) * 1000, 3),
+        "rest_calls": sum(stats.rest_calls.values()),
+        "rest_calls_by_route": stats.rest_calls,
+        "max_rss_growth_kib": memory_after - memory_before,
+        "max_rss_kib": memory_after,
+        "loop_lag_ms_p99": round(percentile(lags, 0.99) * 1000, 3),
+        "loop_lag_ms_max": round(max(lags, default=0.0) * 1000, 3),
+    }
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Replay a message stream through the WordWatch Bot and measure it.")
+    parser.add_argument("--replay", help="JSON lines file of recorded messages to replay instead of synthetic traffic")
+    parser.add_argument("--guilds", type=int, default=2, help="number of synthetic guilds")
+    parser.add_argument("--channels", type=int, default=3, help="channels per synthetic guild")
+    parser.add_argument("--authors", type=int, default=20, help="authors per synthetic guild")
+    parser.add_argument("--keywords", type=int, default=10, help="number of watched synthetic keywords")
+    parser.add_argument("--keyword", action="append", help="extra keyword to watch, may be repeated")
+    parser.add_argument("--rate", type=float, default=20.0, help="synthetic messages per second across all guilds")
+    parser.add_argument("--hit-ratio", type=float, default=0.05, help="fraction of synthetic messages containing a keyword")
+    parser.add_argument("--duration", type=float, default=300.0, help="length of the synthetic stream in seconds")
+    parser.add_argument("--speed", type=float, default=0.0, help="replay at N times real time, 0 replays as fast as possible")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for synthetic traffic")
+    parser.add_argument("--min-throughput", type=float, help="exit with status 1 below this many messages per second")
+    parser.add_argument("--output", help="also write the report as JSON to this file")
+    parser.add_argument("--verbosity", default='error', choices=['debug', 'info', 'warning', 'error'], help="bot verbosity during the run")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    report = asyncio.run(run(args))
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    if output:
+        with open(output, "w", encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=4)
+
+    if args.min_throughput is not None and report["throughput_msgs_per_second"] < args.min_throughput:
+        print(f"FAIL: throughput {report['throughput_msgs_per_second']} msgs/s is below {args.min_throughput} msgs/s")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main_cli()
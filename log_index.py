@@ -0,0 +1,106 @@
+# log_index.py
+# Full-text index over the logged messages for the WordWatch Bot
+
+import sqlite3
+
+# Bumped whenever the table layout changes, so stale index files are rebuilt
+SCHEMA_VERSION = 2
+
+# Entries added before the pending inserts are committed
+BATCH_SIZE = 500
+
+
+class LogIndex:
+    """SQLite FTS5 index mirroring the entries in the bot's message log."""
+
+    def __init__(self, path):
+        self.path = path
+        self.pending = 0  # Inserts not committed yet
+        self.conn = sqlite3.connect(path)
+        # Python's lower() so deletions match the in-memory log exactly; words are separated by newlines
+        self.conn.create_function("contains_any_ci", 2, lambda content, words: any(word in content.lower() for word in words.split("\n")),
+                                  deterministic=True)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS log_fts")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS log_fts USING fts5("
+            "content, author UNINDEXED, guild_id UNINDEXED, channel_id UNINDEXED, "
+            "date UNINDEXED, timestamp UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+        )
+        self.conn.commit()
+
+    def count(self):
+        """Returns the number of indexed entries."""
+        return self.conn.execute("SELECT count(*) FROM log_fts").fetchone()[0]
+
+    def add(self, guild_id, channel_id, date_str, author, content, timestamp):
+        """Indexes a single log entry as it is logged, committing once every BATCH_SIZE entries."""
+        self.conn.execute(
+            "INSERT INTO log_fts (content, author, guild_id, channel_id, date, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+            (content, author, str(guild_id), str(channel_id), date_str, timestamp)
+        )
+        self.pending += 1
+        if self.pending >= BATCH_SIZE:
+            self.commit()
+
+    def commit(self):
+        """Commits the pending inserts."""
+        self.conn.commit()
+        self.pending = 0
+
+    def rebuild(self, message_log, guild_for_channel):
+        """Drops the index and re-indexes every entry of the message log."""
+        rows = []
+        for date_str, channels in message_log.items():
+            for channel_id, channel_log in channels.items():
+                guild_id = guild_for_channel(channel_id)
+                for author, content, timestamp in channel_log:
+                    rows.append((content, author, str(guild_id), str(channel_id), date_str, timestamp))
+        self.conn.execute("DELETE FROM log_fts")
+        self.conn.executemany(
+            "INSERT INTO log_fts (content, author, guild_id, channel_id, date, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        self.commit()
+
+    def remove_containing(self, words):
+        """Removes entries whose content contains any of the words in a single pass, as deleteword does for the log."""
+        self.conn.execute("DELETE FROM log_fts WHERE contains_any_ci(content, ?)", ("\n".join(word.lower() for word in words),))
+        self.commit()
+
+    def clear(self):
+        """Removes all indexed entries."""
+        self.conn.execute("DELETE FROM log_fts")
+        self.commit()
+
+    def search(self, guild_id, terms, channel_id=None, author=None, start_date=None, end_date=None, limit=10, offset=0):
+        """Returns (total, rows) for the entries matching all terms and filters, newest first."""
+        # Quote every term so user input is never parsed as FTS5 query syntax
+        match = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        where = ["log_fts MATCH ?", "guild_id = ?"]
+        params = [match, str(guild_id)]
+        if channel_id is not None:
+            where.append("channel_id = ?")
+            params.append(str(channel_id))
+        if author is not None:
+            where.append("author = ? COLLATE NOCASE")
+            params.append(author)
+        if start_date is not None:
+            where.append("date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            where.append("date <= ?")
+            params.append(end_date)
+        clause = " AND ".join(where)
+        total = self.conn.execute(f"SELECT count(*) FROM log_fts WHERE {clause}", params).fetchone()[0]
+        rows = self.conn.execute(
+            f"SELECT date, channel_id, author, content, timestamp FROM log_fts WHERE {clause} "
+            "ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return total, rows
+
+    def close(self):
+        self.commit()
+        self.conn.close()
@@ -0,0 +1,75 @@
+# log_store.py
+# Compact in-memory message log for the WordWatch Bot
+
+import datetime
+import sys
+from array import array
+
+
+class ChannelLog:
+    """Logged messages of one channel on one day, stored column by column.
+
+    Authors are interned so repeated display names share one string, and timestamps are
+    epoch seconds in a float array. The JSON layout is only produced by to_json.
+    """
+    __slots__ = ('authors', 'contents', 'timestamps')
+
+    def __init__(self):
+        self.authors = []
+        self.contents = []
+        self.timestamps = array('d')
+
+    def append(self, author, content, timestamp):
+        self.authors.append(sys.intern(author))
+        self.contents.append(content)
+        self.timestamps.append(timestamp)
+
+    def __len__(self):
+        return len(self.contents)
+
+    def __iter__(self):
+        """Yields (author, content, timestamp) for every logged message."""
+        return zip(self.authors, self.contents, self.timestamps)
+
+    def remove_containing(self, words):
+        """Drops the messages whose content contains any of the words (lowercase)."""
+        keep = [i for i, content in enumerate(self.contents) if not any(word in content.lower() for word in words)]
+        if len(keep) != len(self.contents):
+            self.authors = [self.authors[i] for i in keep]
+            self.contents = [self.contents[i] for i in keep]
+            self.timestamps = array('d', (self.timestamps[i] for i in keep))
+
+    def to_json(self):
+        return [{"author": author, "content": content, "timestamp": iso_timestamp(timestamp)} for author, content, timestamp in self]
+
+    @classmethod
+    def from_json(cls, messages):
+        channel_log = cls()
+        for message in messages:
+            channel_log.append(message["author"], message["content"], epoch_timestamp(message["timestamp"]))
+        return channel_log
+
+
+def iso_timestamp(timestamp):
+    """Formats epoch seconds as the ISO timestamp used in the JSON files and exports."""
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat()
+
+
+def epoch_timestamp(iso):
+    """Parses an ISO timestamp from the JSON files into epoch seconds, assuming UTC if naive."""
+    parsed = datetime.datetime.fromisoformat(iso)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+def load_message_log(data):
+    """Converts the JSON message log {date: {channel_id: [message]}} into ChannelLogs keyed by integer channel id."""
+    return {date_str: {int(channel_id): ChannelLog.from_json(messages) for channel_id, messages in channels.items()}
+            for date_str, channels in data.items()}
+
+
+def dump_message_log(message_log):
+    """Converts the in-memory message log back into its JSON layout."""
+    return {date_str: {str(channel_id): channel_log.to_json() for channel_id, channel_log in channels.items()}
+            for date_str, channels in message_log.items()}
@@ -4,13 +4,23 @@ import asyncio
 import json
 import os
 import datetime
-from collections import defaultdict
 import re
 import pandas as pd  # Import pandas for Excel export
 from bot_token import token
 import help_str
 import os
 import glob
+import io
+import sys
+import argparse
+import shlex
+import time
+import tempfile
+import contextlib
+from log_index import LogIndex
+from keyword_stats import KeywordStats, sparkline
+from watchlist_io import parse_watchlist, export_watchlist
+from log_store import ChannelLog, load_message_log, dump_message_log, iso_timestamp
 
 # Global verbosity level
 global_verbosity = 'info'
@@ -41,40 +51,58 @@ def safe_print(*args, level='info'):
             print(*(str(arg).encode('ascii', 'ignore').decode('ascii') for arg in args))
 
 class WordWatchBot(commands.Bot):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, data_dir="data", **kwargs):
         super().__init__(*args, **kwargs)
         self.verbosity_level = 'info'  # Default verbosity level
         global global_verbosity
         global_verbosity = self.verbosity_level  # Update the global verbosity
         self.prefix = prefix
+        # Per-guild files live in data_dir/<guild_id>/, the same names at the top level are the legacy single files
+        self.data_dir = data_dir
         self.user_words_file = "userwords.json"
         self.user_cds_file = "usercds.json"
         self.message_log_file = "message_log.json"
+        self.message_index_file = "message_log.db"
+        self.keyword_stats_file = "keyword_stats.json"
         self.thumb = "https://raw.githubusercontent.com/pixeltopic/WordWatch/master/alertimage.gif"
         self.static = -1
         self.scan_frequency = 5
         self.save_frequency = 900
         self.user_words = {}
         self.user_cds = {}
-        self.message_log = defaultdict(lambda: defaultdict(list))
+        self.dirty_cds = set()  # User ids whose cooldown changed since the last save
+        self.message_log = {}  # guild_id (int) -> date -> channel_id (int) -> ChannelLog
+        self.log_indexes = {}  # guild_id (int) -> LogIndex
+        self.search_page_size = 5
+        self.keyword_stats = KeywordStats()
+        self.loaded_guilds = set()
+        self.dirty_guilds = set()  # Loaded guilds whose state changed since the last save
+        self.guild_last_used = {}  # guild_id (int) -> time.monotonic() of the last use
+        self.guild_pins = {}  # guild_id (int) -> number of commands running in the guild, which keep it loaded
+        self.max_loaded_guilds = 256  # Each loaded guild holds an open search index
+        self.guild_idle_timeout = 3600  # Seconds before an unused guild is saved and unloaded
         self.last_checked = -1
 
     async def setup_hook(self):
         safe_print("Setup hook invoked. Starting save task.", level='info')
+        # Loaded once here, on_ready runs again on every reconnect
+        try:
+            self.user_cds = read_json(self.user_cds_file, {})
+        except (OSError, ValueError) as e:
+            safe_print(f"Error reading {self.user_cds_file}: {e}", level='error')
         self.save_task = asyncio.create_task(self.save_json())
 
     async def on_ready(self):
         safe_print(f"Logged in as {self.user.name}", level='info')
-        if os.path.isfile(self.user_words_file) and os.path.isfile(self.user_cds_file) and os.path.isfile(self.message_log_file):
-            with open(self.user_words_file, "r", encoding='utf-8') as word_data:
-                self.user_words = json.load(word_data)
-            with open(self.user_cds_file, "r", encoding='utf-8') as cd_data:
-                self.user_cds = json.load(cd_data)
-            with open(self.message_log_file, "r", encoding='utf-8') as log_data:
-                self.message_log = json.load(log_data)
-            safe_print("Data loaded successfully.", level='info')
-        else:
-            safe_print("No data files provided or one was missing. No user data loaded.", level='warning')
+        if getattr(self, 'shard_ids', None) is not None:
+            safe_print(f"Running shards {self.shard_ids} of {self.shard_count}.", level='info')
+        if os.path.isfile(self.user_words_file) or os.path.isfile(self.message_log_file):
+            if getattr(self, 'shard_ids', None) is None:
+                self.migrate_legacy_files()
+            else:
+                safe_print("Legacy data files found. Run once without --shard-ids to split them into per-guild files.", level='warning')
+        # Guild state is loaded on demand by the first command used in each guild
+        safe_print(f"Ready with {len(self.guilds)} guilds. Guild data is loaded on first use.", level='info')
         await self.change_presence(activity=discord.Game(name=f"Questions? Type {self.prefix}help"))
 
     async def save_json(self):
@@ -82,38 +110,318 @@ class WordWatchBot(commands.Bot):
         while not self.is_closed():
             await asyncio.sleep(self.save_frequency)
             self.write_to_json()
+            self.unload_idle_guilds()
+
+    def guild_path(self, guild_id, file_name):
+        return os.path.join(self.data_dir, str(guild_id), file_name)
+
+    def load_guild(self, guild_id):
+        """Loads a guild's watch lists, logs, counters and search index the first time the guild is used."""
+        guild_id = int(guild_id)
+        self.guild_last_used[guild_id] = time.monotonic()
+        if guild_id in self.loaded_guilds:
+            return
+        # Make room first so the number of open search indexes stays bounded, never unloading a guild a command is using
+        unpinned = [loaded_id for loaded_id in self.loaded_guilds if loaded_id not in self.guild_pins]
+        for idle_guild_id in sorted(unpinned, key=self.guild_last_used.get)[:max(0, len(self.loaded_guilds) - self.max_loaded_guilds + 1)]:
+            self.unload_guild(idle_guild_id)
+        os.makedirs(os.path.join(self.data_dir, str(guild_id)), exist_ok=True)
+        for user_id, words in read_json(self.guild_path(guild_id, self.user_words_file), {}).items():
+            # JSON turns the integer channel ids of the filters into strings
+            for word_data in words.values():
+                word_data["channels"] = {int(channel_id): static for channel_id, static in word_data["channels"].items()}
+            self.user_words.setdefault(user_id, {})[str(guild_id)] = words
+        self.message_log[guild_id] = load_message_log(read_json(self.guild_path(guild_id, self.message_log_file), {}))
+        self.keyword_stats.load_guild(guild_id, read_json(self.guild_path(guild_id, self.keyword_stats_file), {}))
+        self.log_indexes[guild_id] = LogIndex(self.guild_path(guild_id, self.message_index_file))
+        self.loaded_guilds.add(guild_id)
+        self.sync_log_index(guild_id)
+        safe_print(f"Loaded data for guild {guild_id}.", level='debug')
+
+    def unload_guild(self, guild_id):
+        """Saves a guild if needed, closes its search index and drops its state. Returns False if it could not be saved."""
+        if guild_id in self.dirty_guilds:
+            try:
+                self.write_guild(guild_id)
+            except Exception as e:
+                safe_print(f"Error saving guild {guild_id}, keeping it loaded: {e}", level='error')
+                return False
+        self.log_indexes.pop(guild_id).close()
+        self.message_log.pop(guild_id, None)
+        self.keyword_stats.reset_guild(guild_id)
+        for user_id in list(self.user_words):
+            self.user_words[user_id].pop(str(guild_id), None)
+            if not self.user_words[user_id]:
+                del self.user_words[user_id]
+        self.loaded_guilds.discard(guild_id)
+        self.guild_last_used.pop(guild_id, None)
+        safe_print(f"Unloaded data for guild {guild_id}.", level='debug')
+        return True
+
+    def unload_idle_guilds(self):
+        """Unloads the guilds no command has used for guild_idle_timeout seconds."""
+        cutoff = time.monotonic() - self.guild_idle_timeout
+        for guild_id in [guild_id for guild_id in self.loaded_guilds
+                         if guild_id not in self.guild_pins and self.guild_last_used.get(guild_id, 0) < cutoff]:
+            self.unload_guild(guild_id)
+
+    def pin_guild(self, guild_id):
+        """Keeps a guild loaded until a matching unpin_guild, e.g. while a command runs in it."""
+        guild_id = int(guild_id)
+        self.guild_pins[guild_id] = self.guild_pins.get(guild_id, 0) + 1
+
+    def unpin_guild(self, guild_id):
+        guild_id = int(guild_id)
+        self.guild_pins[guild_id] -= 1
+        if not self.guild_pins[guild_id]:
+            del self.guild_pins[guild_id]
+        self.guild_last_used[guild_id] = time.monotonic()  # The idle timeout counts from the end of the command
+
+    def mark_dirty(self, guild_id):
+        """Flags a guild's state to be written by the next save."""
+        self.dirty_guilds.add(int(guild_id))
 
     def write_to_json(self):
+        """Saves the cooldowns and the state of every guild changed since the last save."""
+        safe_print("Saving user data...", level='info')
+        failed = False
         try:
-            safe_print("Saving user data...", level='info')
-            with open(self.user_words_file, "w", encoding='utf-8') as word_file:
-                json.dump(self.user_words, word_file, ensure_ascii=False, indent=4, separators=(',', ': '), sort_keys=True)
-            with open(self.user_cds_file, "w", encoding='utf-8') as cds_file:
-                json.dump(self.user_cds, cds_file, ensure_ascii=False, indent=4, separators=(',', ': '), sort_keys=True)
-            with open(self.message_log_file, "w", encoding='utf-8') as log_file:
-                json.dump(self.message_log, log_file, ensure_ascii=False, indent=4, separators=(',', ': '), sort_keys=True)
-            safe_print(f"User data saved at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", level='info')
+            self.write_user_cds()
         except Exception as e:
-            safe_print(f"Error writing to JSON: {e}", level='error')
+            failed = True
+            safe_print(f"Error writing {self.user_cds_file}: {e}", level='error')
+        # A failing guild stays dirty and is retried by the next save, without blocking the others
+        for guild_id in list(self.dirty_guilds):
+            try:
+                self.write_guild(guild_id)
+            except Exception as e:
+                failed = True
+                safe_print(f"Error writing data of guild {guild_id}: {e}", level='error')
+        if not failed:
+            safe_print(f"User data saved at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", level='info')
+        return not failed
 
-    def export_logs_to_excel(self, start_date, end_date):
+    def write_user_cds(self):
+        """Merges the changed cooldowns into the shared cooldown file, which other shard processes also write."""
+        if not self.dirty_cds:
+            return
+        changed = {user_id: self.user_cds[user_id] for user_id in self.dirty_cds if user_id in self.user_cds}
+        with file_lock(self.user_cds_file):
+            try:
+                user_cds = read_json(self.user_cds_file, {})
+            except ValueError as e:
+                safe_print(f"{self.user_cds_file} is unreadable, rewriting it from memory: {e}", level='warning')
+                user_cds = dict(self.user_cds)
+            user_cds.update(changed)
+            write_json(self.user_cds_file, user_cds)
+        self.dirty_cds.clear()
+
+    def write_guild(self, guild_id):
+        """Writes all state files of one guild. The guild stays dirty if any of them fails."""
+        self.write_guild_words(guild_id)
+        write_json(self.guild_path(guild_id, self.message_log_file), dump_message_log(self.message_log.get(guild_id, {})))
+        write_json(self.guild_path(guild_id, self.keyword_stats_file), self.keyword_stats.guild_to_dict(guild_id), indent=None)
+        self.dirty_guilds.discard(guild_id)
+
+    def write_guild_words(self, guild_id):
+        """Saves only a guild's watch lists, for changes that leave the other data untouched. Raises if the write fails."""
+        words = {user_id: guilds[str(guild_id)] for user_id, guilds in self.user_words.items() if guilds.get(str(guild_id))}
+        write_json(self.guild_path(guild_id, self.user_words_file), words)
+
+    def migrate_legacy_files(self):
+        """Splits the single userwords/message_log/keyword_stats files of older versions into per-guild files."""
+        safe_print("Migrating legacy data files to per-guild files...", level='info')
+        guilds = {}
+        for user_id, user_guilds in read_json(self.user_words_file, {}).items():
+            for guild_id, words in user_guilds.items():
+                guilds.setdefault(int(guild_id), ({}, {}, {}))[0][user_id] = words
+        unresolved = 0
+        for date_str, channels in read_json(self.message_log_file, {}).items():
+            for channel_id, messages in channels.items():
+                guild_id = self.guild_for_channel(channel_id)
+                if not guild_id:
+                    unresolved += len(messages)
+                    continue
+                guilds.setdefault(guild_id, ({}, {}, {}))[1].setdefault(date_str, {})[channel_id] = messages
+        for guild_id, keywords in read_json(self.keyword_stats_file, {}).items():
+            guilds.setdefault(int(guild_id), ({}, {}, {}))[2].update(keywords)
+
+        for guild_id, (words, log, stats) in guilds.items():
+            os.makedirs(os.path.join(self.data_dir, str(guild_id)), exist_ok=True)
+            write_json(self.guild_path(guild_id, self.user_words_file), words)
+            write_json(self.guild_path(guild_id, self.message_log_file), log)
+            write_json(self.guild_path(guild_id, self.keyword_stats_file), stats, indent=None)
+        # Keep the legacy files as backups, the old search index is rebuilt per guild
+        for file_name in (self.user_words_file, self.message_log_file, self.keyword_stats_file):
+            if os.path.isfile(file_name):
+                os.replace(file_name, file_name + ".migrated")
+        if os.path.isfile(self.message_index_file):
+            os.remove(self.message_index_file)
+        if unresolved:
+            safe_print(f"{unresolved} log entries belong to unknown channels and were left in {self.message_log_file}.migrated.", level='warning')
+        safe_print(f"Migrated data of {len(guilds)} guilds.", level='info')
+
+    def guild_for_channel(self, channel_id):
+        """Returns the guild id owning a channel, or 0 if the channel is unknown."""
+        channel = self.get_channel(int(channel_id))
+        return channel.guild.id if channel and getattr(channel, 'guild', None) else 0
+
+    def sync_log_index(self, guild_id):
+        """Rebuilds a guild's search index if it does not match its loaded message log."""
+        message_log = self.message_log[guild_id]
+        logged = sum(len(channel_log) for channels in message_log.values() for channel_log in channels.values())
+        if self.log_indexes[guild_id].count() != logged:
+            safe_print(f"Rebuilding search index of guild {guild_id} for {logged} log entries.", level='info')
+            self.log_indexes[guild_id].rebuild(message_log, lambda channel_id: guild_id)
+
+    def log_message(self, guild_id, channel_id, date_str, author, content, timestamp):
+        """Adds an entry to a guild's message log and keeps its search index up to date."""
+        self.load_guild(guild_id)
+        message_log = self.message_log[guild_id]
+        if date_str not in message_log:
+            message_log[date_str] = {}
+        if channel_id not in message_log[date_str]:
+            message_log[date_str][channel_id] = ChannelLog()
+        message_log[date_str][channel_id].append(author, content, timestamp)
+        self.log_indexes[guild_id].add(guild_id, channel_id, date_str, author, content, timestamp)
+        self.mark_dirty(guild_id)
+
+    def remove_logs_containing(self, guild_id, words):
+        """Removes a guild's logged messages containing any of the words from its log and search index, and resets their counters."""
+        words = [word.lower() for word in words]
+        for channels in self.message_log[guild_id].values():
+            for channel_log in channels.values():
+                channel_log.remove_containing(words)
+        self.log_indexes[guild_id].remove_containing(words)
+        self.keyword_stats.reset_keywords(guild_id, words)
+        self.mark_dirty(guild_id)
+
+    def clear_logs(self, guild_id):
+        """Removes all of a guild's logged messages and keyword counters."""
+        self.message_log[guild_id].clear()
+        self.log_indexes[guild_id].clear()
+        self.keyword_stats.reset_guild(guild_id)
+        self.mark_dirty(guild_id)
+
+    def export_logs_to_excel(self, guild_id, start_date, end_date):
         start_date = datetime.datetime.strptime(start_date, "%Y%m%d")
         end_date = datetime.datetime.strptime(end_date, "%Y%m%d")
         logs = []
-        for date_str, channels in self.message_log.items():
+        for date_str, channels in self.message_log[guild_id].items():
             log_date = datetime.datetime.strptime(date_str, "%Y-%m-%d")
             if start_date <= log_date <= end_date:
-                for channel_id, messages in channels.items():
-                    for message in messages:
-                        logs.append({"Date": date_str, "Channel": channel_id, "Author": message["author"], "Content": message["content"], "Timestamp": message["timestamp"]})
+                for channel_id, channel_log in channels.items():
+                    for author, content, timestamp in channel_log:
+                        logs.append({"Date": date_str, "Channel": str(channel_id), "Author": author, "Content": content, "Timestamp": iso_timestamp(timestamp)})
         df = pd.DataFrame(logs)
-        file_path = f"message_logs_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.xlsx"
+        file_path = f"message_logs_{guild_id}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.xlsx"
         df.to_excel(file_path, index=False, engine='xlsxwriter')
         return file_path
 
+class ShardedWordWatchBot(WordWatchBot, commands.AutoShardedBot):
+    """WordWatchBot running one or more gateway shards through AutoShardedBot."""
+    pass
+
+def read_json(file_path, default):
+    """Loads a JSON file, or returns the default if it does not exist."""
+    if not os.path.isfile(file_path):
+        return default
+    with open(file_path, "r", encoding='utf-8') as json_file:
+        return json.load(json_file)
+
+def write_json(file_path, data, indent=4):
+    """Writes a JSON file through a uniquely named temporary file so readers never see a partial write."""
+    directory, file_name = os.path.split(file_path)
+    fd, temp_path = tempfile.mkstemp(dir=directory or ".", prefix=file_name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding='utf-8') as json_file:
+            if indent is None:
+                json.dump(data, json_file, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+            else:
+                json.dump(data, json_file, ensure_ascii=False, indent=indent, separators=(',', ': '), sort_keys=True)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+@contextlib.contextmanager
+def file_lock(file_path, timeout=10, stale=30):
+    """Holds an exclusive lock file next to a file shared between shard processes."""
+    lock_path = file_path + ".lock"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            # Take over locks left behind by a process that died while holding them
+            try:
+                if time.time() - os.path.getmtime(lock_path) > stale:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {lock_path}")
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+def parse_args(argv):
+    """Parses the sharding options of the command line."""
+    parser = argparse.ArgumentParser(description="Run the Tracker Bot.")
+    parser.add_argument("--autoshard", action="store_true", help="run as AutoShardedBot with the shard count Discord recommends")
+    parser.add_argument("--shard-ids", help="shards this process runs, as a range (0-3) or a list (0,2,4); requires --shard-count")
+    parser.add_argument("--shard-count", type=int, help="total number of shards across all processes")
+    parser.add_argument("--data-dir", default="data", help="directory holding the per-guild data files")
+    args = parser.parse_args(argv)
+    if args.shard_ids is not None:
+        if not args.shard_count:
+            parser.error("--shard-ids requires --shard-count")
+        shard_range = re.fullmatch(r'\s*(\d+)\s*-\s*(\d+)\s*', args.shard_ids)
+        if shard_range:
+            first, last = int(shard_range.group(1)), int(shard_range.group(2))
+            if first > last:
+                parser.error(f"--shard-ids range {args.shard_ids} is empty, the first shard must not be above the last")
+            args.shard_ids = list(range(first, last + 1))
+        elif re.fullmatch(r'\s*\d+\s*(,\s*\d+\s*)*', args.shard_ids):
+            args.shard_ids = [int(shard_id) for shard_id in args.shard_ids.split(',')]
+        else:
+            parser.error(f"--shard-ids must be a range (0-3) or a list (0,2,4), not {args.shard_ids}")
+        if any(shard_id < 0 or shard_id >= args.shard_count for shard_id in args.shard_ids):
+            parser.error("--shard-ids must be between 0 and --shard-count - 1")
+    return args
+
 # Create an instance of the bot
-safe_print("Creating WordWatchBot instance.")
-bot = WordWatchBot(command_prefix=prefix, intents=intents, member_cache_flags=discord.MemberCacheFlags.all())
+options = parse_args(sys.argv[1:] if __name__ == '__main__' else [])
+if options.shard_ids:
+    safe_print(f"Creating ShardedWordWatchBot instance for shards {options.shard_ids} of {options.shard_count}.")
+    bot = ShardedWordWatchBot(command_prefix=prefix, intents=intents, member_cache_flags=discord.MemberCacheFlags.all(),
+                              data_dir=options.data_dir, shard_ids=options.shard_ids, shard_count=options.shard_count)
+elif options.autoshard or options.shard_count:
+    safe_print("Creating ShardedWordWatchBot instance.")
+    bot = ShardedWordWatchBot(command_prefix=prefix, intents=intents, member_cache_flags=discord.MemberCacheFlags.all(),
+                              data_dir=options.data_dir, shard_count=options.shard_count)
+else:
+    safe_print("Creating WordWatchBot instance.")
+    bot = WordWatchBot(command_prefix=prefix, intents=intents, member_cache_flags=discord.MemberCacheFlags.all(), data_dir=options.data_dir)
+
+# Load the state of a guild before running any command in it, and keep it loaded until the command ends
+@bot.before_invoke
+async def load_guild_state(ctx):
+    if ctx.guild is not None:
+        bot.load_guild(ctx.guild.id)
+        bot.pin_guild(ctx.guild.id)
+
+# Runs even when the command raised, but only if load_guild_state did
+@bot.after_invoke
+async def release_guild_state(ctx):
+    if ctx.guild is not None:
+        bot.unpin_guild(ctx.guild.id)
 
 # Remove the default help command
 safe_print("Removing default help command.")
@@ -172,6 +480,10 @@ async def help(ctx, page: int = 1):
         embed.add_field(name="..setverbosity", value=help_str.setverbosity_str, inline=False)
         embed.add_field(name="..cleardm", value=help_str.clear_dm_str, inline=False)
         embed.add_field(name="clearlogs", value=help_str.clearlogs_str, inline=False)
+        embed.add_field(name="searchlogs", value=help_str.searchlogs_str, inline=False)
+        embed.add_field(name="watchwords", value=help_str.watchwords_str, inline=False)
+        embed.add_field(name="deletewords", value=help_str.deletewords_str, inline=False)
+        embed.add_field(name="exportwords", value=help_str.exportwords_str, inline=False)
     else:
         await ctx.send("Invalid help page number.")
         return
@@ -222,6 +534,7 @@ async def watchword(ctx, word: str, *channels: discord.TextChannel):
             "last_alerted": 0,
             "notify_users": []  # Initialize notify_users as an empty list
         }
+        bot.mark_dirty(ctx.guild.id)
         await ctx.send(f"Word '{word}' has been added to your watch list in the specified channels.")
     except Exception as e:
         safe_print(f"Error in watchword: {e}")  # Log error to console
@@ -244,11 +557,8 @@ async def deleteword(ctx, word: str):
         # Delete the word from the user's watch list
         del bot.user_words[user_id][guild_id][word.lower()]
 
-        # Remove the word's logs from the message_log
-        for date_str, channels in bot.message_log.items():
-            for channel_id, messages in channels.items():
-                # Remove messages that contain the word
-                bot.message_log[date_str][channel_id] = [msg for msg in messages if word.lower() not in msg["content"].lower()]
+        # Remove messages that contain the word from the message_log
+        bot.remove_logs_containing(ctx.guild.id, [word])
 
         await ctx.send(f"Word '{word}' has been removed from your watch list and its logs have been cleared.")
     except Exception as e:
@@ -266,6 +576,7 @@ async def watchclear(ctx):
     try:
         if user_id in bot.user_words and guild_id in bot.user_words[user_id]:
             bot.user_words[user_id][guild_id] = {}
+            bot.mark_dirty(ctx.guild.id)
             await ctx.send("Your watch list has been cleared.")
         else:
             await ctx.send("You have no watched words to clear.")
@@ -282,6 +593,7 @@ async def cd(ctx, minutes: int = 15):
 
     try:
         bot.user_cds[user_id] = minutes * 60  # convert minutes to seconds
+        bot.dirty_cds.add(user_id)
         await ctx.send(f"Notification cooldown set to {minutes} minutes.")
     except Exception as e:
         safe_print(f"Error in cd: {e}")  # Log error to console
@@ -302,8 +614,23 @@ async def worddetail(ctx, word: str):
 
         word_data = bot.user_words[user_id][guild_id][word.lower()]
         channels = [f"<#{channel_id}>" for channel_id in word_data["channels"]]
-        last_seen = datetime.datetime.fromtimestamp(word_data["last_alerted"]).strftime('%Y-%m-%d %H:%M:%S')
-        await ctx.send(f"Word '{word}' is being watched in: {', '.join(channels) if channels else 'all channels'}\nLast seen: {last_seen}")
+        last_hit = bot.keyword_stats.last_seen(guild_id, word.lower())
+        last_seen = datetime.datetime.fromtimestamp(last_hit).strftime('%Y-%m-%d %H:%M:%S') if last_hit else 'never'
+
+        # Mention trends from the precomputed hit counters
+        counter = bot.keyword_stats.get(guild_id, word.lower())
+        hourly = bot.keyword_stats.trend(guild_id, word.lower(), 'hour', 24)
+        daily = bot.keyword_stats.trend(guild_id, word.lower(), 'day', 7)
+        last_hour = sum(bot.keyword_stats.trend(guild_id, word.lower(), 'minute', 60))
+        top_channels = bot.keyword_stats.top_channels(guild_id, word.lower(), 'day', 7)
+        busiest = ', '.join(f"<#{channel_id}> ({hits})" for channel_id, hits in top_channels) if top_channels else 'none'
+        await ctx.send(
+            f"Word '{word}' is being watched in: {', '.join(channels) if channels else 'all channels'}\nLast seen: {last_seen}\n"
+            f"Mentions: {last_hour} in the last hour, {sum(hourly)} in the last 24 hours, {sum(daily)} in the last 7 days, "
+            f"{counter.total if counter else 0} in total\n"
+            f"Last 24 hours: `{sparkline(hourly)}`\nLast 7 days: `{sparkline(daily)}` ({', '.join(str(hits) for hits in daily)})\n"
+            f"Busiest channels (7 days): {busiest}"
+        )
     except Exception as e:
         safe_print(f"Error in worddetail: {e}")  # Log error to console
         await ctx.send("An error occurred while retrieving word details.")
@@ -329,6 +656,7 @@ async def addfilter(ctx, word: str, *channels: discord.TextChannel):
         word_data = bot.user_words[user_id][guild_id][word.lower()]
         for channel in channels:
             word_data["channels"][channel.id] = bot.static
+        bot.mark_dirty(ctx.guild.id)
         
         await ctx.send(f"Filters have been added to the word '{word}' for the specified channels.")
     except Exception as e:
@@ -352,6 +680,7 @@ async def deletefilter(ctx, word: str, *channels: discord.TextChannel):
         for channel in channels:
             if channel.id in word_data["channels"]:
                 del word_data["channels"][channel.id]
+        bot.mark_dirty(ctx.guild.id)
         
         await ctx.send(f"Filters have been removed from the word '{word}' for the specified channels.")
     except Exception as e:
@@ -401,12 +730,7 @@ async def fetchhistory(ctx, start_date: str, end_date: str, *channels: discord.T
                     for keyword, data in bot.user_words[user_id][guild_id].items():
                         # Use regex to match the whole word
                         if re.search(rf'\b{re.escape(keyword)}\b', message.content, re.IGNORECASE):
-                            # Log the message grouped by date and channel
                             date_str = message.created_at.strftime('%Y-%m-%d')
-                            if date_str not in bot.message_log:
-                                bot.message_log[date_str] = {}
-                            if str(channel.id) not in bot.message_log[date_str]:
-                                bot.message_log[date_str][str(channel.id)] = []
 
                             # Attempt to fetch the member's display name
                             member = message.guild.get_member(message.author.id)
@@ -415,12 +739,9 @@ async def fetchhistory(ctx, start_date: str, end_date: str, *channels: discord.T
                             else:
                                 member_display_name = member.display_name
 
-                            # Add message details to the log
-                            bot.message_log[date_str][str(channel.id)].append({
-                                "author": member_display_name,
-                                "content": message.content,
-                                "timestamp": message.created_at.isoformat()
-                            })
+                            # Log the message grouped by date and channel
+                            bot.log_message(ctx.guild.id, channel.id, date_str, member_display_name, message.content, message.created_at.timestamp())
+                            bot.keyword_stats.record(ctx.guild.id, keyword, channel.id, message.created_at.timestamp(), message.id)
 
                             # Notify users if set in the 'notify_users' list
                             notify_users = data.get('notify_users', [])
@@ -442,6 +763,10 @@ async def fetchhistory(ctx, start_date: str, end_date: str, *channels: discord.T
     except Exception as e:
         safe_print(f"Error in fetchhistory: {e}")  # Log error to console
         await ctx.send(f"An error occurred while fetching historical messages: {e}")
+    finally:
+        # The search index commits in batches, write out the rest of this run
+        if ctx.guild.id in bot.log_indexes:
+            bot.log_indexes[ctx.guild.id].commit()
 
 # Define exportlogs command
 @bot.command()
@@ -451,7 +776,7 @@ async def exportlogs(ctx, start_date: str, end_date: str):
 
     try:
         # Export logs to an Excel file
-        file_path = bot.export_logs_to_excel(start_date, end_date)
+        file_path = bot.export_logs_to_excel(ctx.guild.id, start_date, end_date)
 
         # Send the file to the user
         await ctx.send(file=discord.File(file_path))
@@ -459,6 +784,62 @@ async def exportlogs(ctx, start_date: str, end_date: str):
         safe_print(f"Error in exportlogs: {e}")  # Log error to console
         await ctx.send(f"An error occurred while exporting the logs: {e}")
 
+# Define searchlogs command
+@bot.command()
+async def searchlogs(ctx, *, query: str):
+    """Searches the logged messages for terms, with optional in:, author:, from:, to: and page: filters."""
+    safe_print(f"searchlogs command invoked with query: {query}")  # Debug print
+
+    try:
+        terms = []
+        channel_id = None
+        author = None
+        start_date = None
+        end_date = None
+        page = 1
+        # Quotes keep multi-word values together, e.g. author:"John Smith"
+        for part in shlex.split(query):
+            key, _, value = part.partition(':')
+            if key == 'in' and value:
+                channel_id = int(value.strip('<#>'))
+            elif key == 'author' and value:
+                author = value
+            elif key == 'from' and value:
+                start_date = datetime.datetime.strptime(value, "%Y%m%d").strftime('%Y-%m-%d')
+            elif key == 'to' and value:
+                end_date = datetime.datetime.strptime(value, "%Y%m%d").strftime('%Y-%m-%d')
+            elif key == 'page' and value:
+                page = max(int(value), 1)
+            else:
+                terms.append(part)
+
+        if not terms:
+            await ctx.send("Please provide at least one search term.")
+            return
+
+        total, rows = bot.log_indexes[ctx.guild.id].search(ctx.guild.id, terms, channel_id=channel_id, author=author, start_date=start_date,
+                                           end_date=end_date, limit=bot.search_page_size, offset=(page - 1) * bot.search_page_size)
+        if total == 0:
+            await ctx.send("No logged messages matched your search.")
+            return
+
+        pages = (total + bot.search_page_size - 1) // bot.search_page_size
+        if page > pages:
+            await ctx.send(f"Invalid page number. There are {pages} pages of results.")
+            return
+
+        embed = discord.Embed(title=f"Log Search: {' '.join(terms)}", description=f"{total} matching messages", color=0x30abc0)
+        for date_str, channel, message_author, content, timestamp in rows:
+            embed.add_field(name=f"{message_author} in #{bot.get_channel(int(channel)) or channel} at {iso_timestamp(timestamp)[:19].replace('T', ' ')}",
+                            value=content[:1024], inline=False)
+        embed.set_footer(text=f"Page {page}/{pages} - add page:<n> to your search to see more.")
+        await ctx.send(embed=embed)
+    except ValueError:
+        await ctx.send('Invalid filter. Use in:#channel, author:<name> (or author:"<name with spaces>"), from:YYYYMMDD, to:YYYYMMDD and page:<n>.')
+    except Exception as e:
+        safe_print(f"Error in searchlogs: {e}")  # Log error to console
+        await ctx.send(f"An error occurred while searching the logs: {e}")
+
 # Define forcesave command
 @bot.command()
 @commands.has_permissions(administrator=True)
@@ -466,8 +847,10 @@ async def forcesave(ctx):
     """Force saves all current data into the JSON files. Admin only!"""
     safe_print("forcesave command invoked")  # Debug print
     try:
-        bot.write_to_json()
-        await ctx.send("All data has been force-saved to the JSON files.")
+        if bot.write_to_json():
+            await ctx.send("All data has been force-saved to the JSON files.")
+        else:
+            await ctx.send("Some data could not be saved. Check the console for details.")
     except Exception as e:
         safe_print(f"Error in forcesave: {e}")  # Log error to console
         await ctx.send("An error occurred while force-saving data.")
@@ -506,7 +889,12 @@ async def admindashboard(ctx):
     embed.set_thumbnail(url=bot.thumb)
     embed.add_field(name="Scan Frequency", value=f"{bot.scan_frequency} seconds", inline=False)
     embed.add_field(name="Save Frequency", value=f"{bot.save_frequency / 60} minutes", inline=False)
-    embed.add_field(name="Watched Words", value=f"{len(bot.user_words)} users", inline=False)
+    watchers = sum(1 for guilds in bot.user_words.values() if guilds.get(str(ctx.guild.id)))
+    embed.add_field(name="Watched Words", value=f"{watchers} users", inline=False)
+    top_keywords = bot.keyword_stats.top_keywords(ctx.guild.id, 'hour', 24)
+    embed.add_field(name="Top Keywords (24 hours)", value="\n".join(
+        f"`{keyword}` - {hits} mentions" for keyword, hits in top_keywords
+    ) if top_keywords else "No keyword mentions in the last 24 hours.", inline=False)
     embed.add_field(name="Commands", value=(
         "`..setscan <seconds>` - Set scan frequency\n"
         "`..setsave <minutes>` - Set save frequency\n"
@@ -594,12 +982,15 @@ async def removerole(ctx, command: str, role: discord.Role):
 @bot.command()
 @commands.has_permissions(administrator=True)
 async def listwatched(ctx):
-    """Lists all watched words and the users watching them."""
+    """Lists all words watched in this server and the users watching them."""
     watched_summary = ""
-    for user_id, guilds in bot.user_words.items():
+    # Other loaded guilds share bot.user_words, only this guild's watch lists are shown
+    for user_id, guilds in list(bot.user_words.items()):
+        words = guilds.get(str(ctx.guild.id))
+        if not words:
+            continue
         user = await bot.fetch_user(user_id)
-        for guild_id, words in guilds.items():
-            watched_summary += f"**{user.name}** ({len(words)} words): {', '.join(words.keys())}\n"
+        watched_summary += f"**{user.name}** ({len(words)} words): {', '.join(words.keys())}\n"
 
     if watched_summary == "":
         watched_summary = "No words are being watched currently."
@@ -623,6 +1014,7 @@ async def removenotify(ctx, word: str, *members: discord.Member):
             if member.id in notify_list:
                 notify_list.remove(member.id)
                 removed_members.append(member.display_name)
+        bot.mark_dirty(ctx.guild.id)
         if removed_members:
             await ctx.send(f"Removed {', '.join(removed_members)} from notifications for '{word}'.")
         else:
@@ -651,6 +1043,7 @@ async def addnotify(ctx, word: str, *members: discord.Member):
         
         # Update the notify_users list
         bot.user_words[user_id][guild_id][word]['notify_users'] = notify_list
+        bot.mark_dirty(ctx.guild.id)
         
         if added_members:
             await ctx.send(f"Added {', '.join(added_members)} to notifications for '{word}'.")
@@ -659,6 +1052,125 @@ async def addnotify(ctx, word: str, *members: discord.Member):
     else:
         await ctx.send(f"'{word}' is not being watched.")
 
+# Define the watchwords command
+@bot.command()
+async def watchwords(ctx, *args: str):
+    """Watch many words at once, given inline (with optional channel mentions) and/or in an attached JSON or CSV file."""
+    safe_print(f"watchwords command invoked with {len(args)} arguments and {len(ctx.message.attachments)} attachments")  # Debug print
+    user_id = str(ctx.author.id)
+    guild_id = str(ctx.guild.id)
+
+    try:
+        # Collect every requested word before touching the watch list
+        inline_channels = [int(arg[2:-1]) for arg in args if re.fullmatch(r'<#\d+>', arg)]
+        incoming = {arg.lower(): {"channels": inline_channels, "notify_users": []} for arg in args if not re.fullmatch(r'<#\d+>', arg)}
+        for attachment in ctx.message.attachments:
+            incoming.update(parse_watchlist(attachment.filename, await attachment.read()))
+
+        if not incoming:
+            await ctx.send("Please provide words or attach a JSON or CSV watch list.")
+            return
+
+        # Apply all words to a copy so the watch list only changes if every entry is valid
+        current = bot.user_words.get(user_id, {}).get(guild_id, {})
+        updated = {word: {**data, "channels": dict(data["channels"]), "notify_users": list(data.get("notify_users", []))}
+                   for word, data in current.items()}
+        skipped = 0
+        for word, details in incoming.items():
+            channels = [channel_id for channel_id in details["channels"] if ctx.guild.get_channel(channel_id)]
+            notify_users = [member_id for member_id in details["notify_users"] if ctx.guild.get_member(member_id)]
+            skipped += len(details["channels"]) - len(channels) + len(details["notify_users"]) - len(notify_users)
+            word_data = updated.setdefault(word, {"channels": {}, "last_alerted": 0, "notify_users": []})
+            for channel_id in channels:
+                word_data["channels"][channel_id] = bot.static
+            for member_id in notify_users:
+                if member_id not in word_data["notify_users"]:
+                    word_data["notify_users"].append(member_id)
+
+        added = len(updated) - len(current)
+        previous = bot.user_words.get(user_id, {}).get(guild_id)
+        bot.user_words.setdefault(user_id, {})[guild_id] = updated
+        try:
+            bot.write_guild_words(ctx.guild.id)
+        except Exception as e:
+            # Roll back so memory keeps matching what is saved
+            if previous is None:
+                del bot.user_words[user_id][guild_id]
+            else:
+                bot.user_words[user_id][guild_id] = previous
+            safe_print(f"Error saving watch list in watchwords: {e}", level='error')
+            await ctx.send("Your watch list could not be saved, nothing was changed.")
+            return
+
+        summary = f"Processed {len(incoming)} words: {added} added, {len(incoming) - added} already watched and updated."
+        if skipped:
+            summary += f" Skipped {skipped} unknown channels or members."
+        await ctx.send(summary)
+    except (ValueError, TypeError) as e:
+        await ctx.send(f"Could not read the watch list, nothing was changed: {e}")
+    except Exception as e:
+        safe_print(f"Error in watchwords: {e}")  # Log error to console
+        await ctx.send("An error occurred while adding the words to your watch list.")
+
+# Define the deletewords command
+@bot.command()
+async def deletewords(ctx, *words: str):
+    """Deletes many words from your watch list and their logs at once."""
+    safe_print(f"deletewords command invoked with words: {words}")  # Debug print
+    user_id = str(ctx.author.id)
+    guild_id = str(ctx.guild.id)
+
+    try:
+        guild_words = bot.user_words.get(user_id, {}).get(guild_id, {})
+        removed = [word for word in dict.fromkeys(word.lower() for word in words) if word in guild_words]
+        if not removed:
+            await ctx.send("None of these words are in your watch list.")
+            return
+
+        for word in removed:
+            del guild_words[word]
+
+        # Remove the words' logs from the message_log in a single pass
+        bot.remove_logs_containing(ctx.guild.id, removed)
+        try:
+            bot.write_guild_words(ctx.guild.id)
+        except Exception as e:
+            # The guild is already marked dirty, so the next save retries
+            safe_print(f"Error saving watch list in deletewords: {e}", level='error')
+            await ctx.send(f"Removed {len(removed)} words from your watch list, but saving failed. It will be retried with the next save.")
+            return
+
+        await ctx.send(f"Removed {len(removed)} words from your watch list and cleared their logs: {', '.join(removed)}")
+    except Exception as e:
+        safe_print(f"Error in deletewords: {e}")  # Log error to console
+        await ctx.send("An error occurred while removing the words from your watch list.")
+
+# Define the exportwords command
+@bot.command()
+async def exportwords(ctx, fmt: str = 'json'):
+    """Exports your watch list for this server as a JSON or CSV file."""
+    safe_print(f"exportwords command invoked with format: {fmt}")  # Debug print
+    user_id = str(ctx.author.id)
+    guild_id = str(ctx.guild.id)
+
+    fmt = fmt.lower()
+    if fmt not in ('json', 'csv'):
+        await ctx.send("Invalid format. Choose from 'json' or 'csv'.")
+        return
+
+    try:
+        guild_words = bot.user_words.get(user_id, {}).get(guild_id, {})
+        if not guild_words:
+            await ctx.send("You have no watched words.")
+            return
+
+        content = export_watchlist(guild_words, fmt)
+        file_name = f"watchlist_{ctx.guild.id}_{ctx.author.id}.{fmt}"
+        await ctx.send(f"Your watch list ({len(guild_words)} words):", file=discord.File(io.BytesIO(content.encode('utf-8')), filename=file_name))
+    except Exception as e:
+        safe_print(f"Error in exportwords: {e}")  # Log error to console
+        await ctx.send("An error occurred while exporting your watch list.")
+
 # Command to test json files
 @bot.command()
 async def test_save(ctx):
@@ -670,11 +1182,11 @@ async def test_save(ctx):
 @bot.command()
 @commands.has_permissions(administrator=True)
 async def clearlogs(ctx):
-    """Clears all the message logs and exported .xlsx files with a confirmation step."""
+    """Clears all the message logs and exported .xlsx files of this server with a confirmation step."""
     # Create an embed asking for confirmation
     embed = discord.Embed(
         title="Clear All Message Logs and Exported Files",
-        description="Are you sure you want to clear all message logs and exported Excel files? This action cannot be undone.",
+        description="Are you sure you want to clear all message logs and exported Excel files of this server? This action cannot be undone.",
         color=0xff0000  # Red color to signify caution
     )
     embed.set_footer(text="React with ✅ to confirm or ❌ to cancel.")
@@ -695,11 +1207,11 @@ async def clearlogs(ctx):
     else:
         if str(reaction.emoji) == '✅':
             # Clear the message logs in memory
-            bot.message_log.clear()
+            bot.clear_logs(ctx.guild.id)
             bot.write_to_json()  # Save the empty state to JSON
 
-            # Find and remove all .xlsx files
-            for file in glob.glob('*.xlsx'):
+            # Find and remove all of this server's .xlsx files
+            for file in glob.glob(f'message_logs_{ctx.guild.id}_*.xlsx'):
                 os.remove(file)
             await ctx.send("All message logs and exported Excel files have been cleared.")
         else:
@@ -0,0 +1,64 @@
+# watchlist_io.py
+# Import and export of watch lists for the WordWatch Bot
+
+import csv
+import io
+import json
+
+
+def parse_watchlist(filename, data):
+    """Parses an uploaded JSON or CSV watch list into {word: {"channels": [ids], "notify_users": [ids]}}.
+
+    JSON files may hold a list of words or an object mapping each word to its channels and notify_users,
+    as written by export_watchlist. CSV files hold one word per row, optionally followed by space separated
+    channel ids and notify user ids, with an optional `word,channels,notify_users` header.
+    Raises ValueError if the file cannot be parsed.
+    """
+    text = data.decode('utf-8-sig')
+    words = {}
+    if filename.lower().endswith('.json'):
+        try:
+            loaded = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        if isinstance(loaded, list):
+            loaded = {word: {} for word in loaded}
+        if not isinstance(loaded, dict):
+            raise ValueError("expected a list of words or an object of words")
+        for word, details in loaded.items():
+            details = details if isinstance(details, dict) else {}
+            words[str(word).lower()] = {
+                "channels": [int(channel_id) for channel_id in details.get("channels", [])],
+                "notify_users": [int(user_id) for user_id in details.get("notify_users", [])]
+            }
+    elif filename.lower().endswith('.csv'):
+        for row in csv.reader(io.StringIO(text)):
+            if not row or not row[0].strip() or row[0].strip().lower() == 'word':
+                continue
+            row = row + [''] * (3 - len(row))
+            words[row[0].strip().lower()] = {
+                "channels": [int(channel_id) for channel_id in row[1].split()],
+                "notify_users": [int(user_id) for user_id in row[2].split()]
+            }
+    else:
+        raise ValueError("only .json and .csv files are supported")
+    return words
+
+
+def export_watchlist(guild_words, fmt):
+    """Serializes a user's watch list for one guild as JSON or CSV text."""
+    words = {
+        word: {
+            "channels": sorted(int(channel_id) for channel_id in data.get("channels", {})),
+            "notify_users": [int(user_id) for user_id in data.get("notify_users", [])]
+        }
+        for word, data in sorted(guild_words.items())
+    }
+    if fmt == 'json':
+        return json.dumps(words, ensure_ascii=False, indent=4)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["word", "channels", "notify_users"])
+    for word, data in words.items():
+        writer.writerow([word, " ".join(map(str, data["channels"])), " ".join(map(str, data["notify_users"]))])
+    return output.getvalue()